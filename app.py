@@ -16,6 +16,7 @@ import json
 import os
 import secrets  # For constant-time comparison to prevent timing attacks
 from datetime import datetime
+from types import MappingProxyType
 import logging
 from dotenv import load_dotenv
 import psycopg2
@@ -90,7 +91,7 @@ idempotency_middleware = IdempotencyMiddleware(get_db_connection)
 logger.info("Idempotency middleware initialized")
 
 # Data type handlers mapping
-DATA_TYPE_HANDLERS = {
+DATA_TYPE_HANDLERS = MappingProxyType({
     "warehouses_full": "handle_warehouses",
     "vendors_full": "handle_vendors",
     "items_full": "handle_items",
@@ -99,7 +100,7 @@ DATA_TYPE_HANDLERS = {
     "purchase_orders_incremental": "handle_purchase_orders",
     "costs_incremental": "handle_costs",
     "pricing_full": "handle_pricing"
-}
+})
 
 
 @app.route('/health', methods=['GET'])
@@ -179,6 +180,11 @@ def ingest_data():
             "error": "Missing data_type"
         }), 400
 
+    # Intern so lookups against the (literal, already interned) handler keys
+    # short-circuit on identity
+    if isinstance(data_type, str):
+        data_type = sys.intern(data_type)
+
     if not records:
         logger.warning(f"No records in payload for data_type={data_type}")
         return jsonify({
@@ -4,7 +4,9 @@ Processes and validates records before storing in Supabase
 """
 
 import logging
-from typing import Dict, List, Any, Optional, Set
+from operator import itemgetter
+from types import MappingProxyType
+from typing import Dict, List, Any, Optional, Set, Tuple, Callable
 from datetime import datetime
 import sys
 import os
@@ -34,6 +36,66 @@ from supabase_client import (
 
 logger = logging.getLogger(__name__)
 
+def coerce_float(value: Any) -> float:
+    """
+    Convert a numeric SAP field to float.
+
+    NULLs and empty strings are treated as 0.0; floats are returned as-is.
+    The inventory and cost handlers use this, so a NULL quantity or cost is
+    stored as 0.0. The order handlers deliberately don't: a NULL quantity,
+    price or total still rejects the order line.
+
+    Raises:
+        ValueError: If the value is a non-numeric string
+    """
+    if type(value) is float:
+        return value
+    if value is None or value == "":
+        return 0.0
+    return float(value)
+
+
+def _field_extractor(fields: Tuple[Tuple[str, Any], ...]) -> Callable[[Dict[str, Any]], Tuple[Any, ...]]:
+    """
+    Build an extractor for (field, default) pairs.
+
+    All fields are fetched with one C-level itemgetter call; records missing
+    any of them fall back to per-field dict.get with the default.
+    """
+    getter = itemgetter(*(name for name, _ in fields))
+
+    def extract(record: Dict[str, Any]) -> Tuple[Any, ...]:
+        try:
+            return getter(record)
+        except KeyError:
+            return tuple(record.get(name, default) for name, default in fields)
+
+    return extract
+
+
+_extract_sales_order_fields = _field_extractor((
+    ("order_date", None),
+    ("customer_code", ""),
+    ("item_code", ""),
+    ("quantity", 0),
+    ("unit_price", 0),
+    ("line_total", 0)
+))
+
+_extract_purchase_order_fields = _field_extractor((
+    ("order_date", None),
+    ("vendor_code", ""),
+    ("item_code", ""),
+    ("quantity", 0),
+    ("unit_price", 0),
+    ("line_total", 0)
+))
+
+_extract_cost_fields = _field_extractor((
+    ("avg_cost", 0),
+    ("last_cost", 0)
+))
+
 # Global cache for warehouse codes
 _warehouse_codes_cache: Optional[Set[str]] = None
 _cache_timestamp: Optional[datetime] = None
@@ -263,18 +325,18 @@ def handle_inventory(records: List[Dict[str, Any]]) -> Dict[str, Any]:
                 continue
 
             # Map SAP fields to database schema
-            on_hand_qty = float(record.get("on_hand_qty", record.get("quantity", 0)))
-            committed_qty = float(record.get("committed_qty", 0))
+            on_hand_qty = coerce_float(record.get("on_hand_qty", record.get("quantity", 0)))
+            committed_qty = coerce_float(record.get("committed_qty", 0))
             available_qty = on_hand_qty - committed_qty
 
             business_records.append({
                 "item_code": item_code,
                 "warehouse_code": warehouse_code,
                 "on_hand_qty": on_hand_qty,
-                "on_order_qty": float(record.get("on_order_qty", 0)),
+                "on_order_qty": coerce_float(record.get("on_order_qty", 0)),
                 "committed_qty": committed_qty,
                 "available_qty": available_qty,
-                "unit_cost": float(record.get("unit_cost", record.get("unit_price", 0)))
+                "unit_cost": coerce_float(record.get("unit_cost", record.get("unit_price", 0)))
             })
 
         except Exception as e:
@@ -364,15 +426,19 @@ def handle_sales_orders(records: List[Dict[str, Any]]) -> Dict[str, Any]:
                 )
                 continue
 
+            order_date, customer_code, item_code, quantity, unit_price, line_total = (
+                _extract_sales_order_fields(record)
+            )
+
             business_records.append({
                 "order_id": int(order_id),
-                "order_date": record.get("order_date"),
-                "customer_code": record.get("customer_code", ""),
-                "item_code": record.get("item_code", ""),
+                "order_date": order_date,
+                "customer_code": customer_code,
+                "item_code": item_code,
                 "warehouse_code": warehouse_code,
-                "quantity": int(record.get("quantity", 0)),
-                "unit_price": float(record.get("unit_price", 0)),
-                "line_total": float(record.get("line_total", 0))
+                "quantity": int(quantity),
+                "unit_price": float(unit_price),
+                "line_total": float(line_total)
             })
 
         except Exception as e:
@@ -461,15 +527,19 @@ def handle_purchase_orders(records: List[Dict[str, Any]]) -> Dict[str, Any]:
                 )
                 continue
 
+            order_date, vendor_code, item_code, quantity, unit_price, line_total = (
+                _extract_purchase_order_fields(record)
+            )
+
             business_records.append({
                 "order_id": int(order_id),
-                "order_date": record.get("order_date"),
-                "vendor_code": record.get("vendor_code", ""),
-                "item_code": record.get("item_code", ""),
+                "order_date": order_date,
+                "vendor_code": vendor_code,
+                "item_code": item_code,
                 "warehouse_code": warehouse_code,
-                "quantity": int(record.get("quantity", 0)),
-                "unit_price": float(record.get("unit_price", 0)),
-                "line_total": float(record.get("line_total", 0))
+                "quantity": int(quantity),
+                "unit_price": float(unit_price),
+                "line_total": float(line_total)
             })
 
         except Exception as e:
@@ -527,10 +597,12 @@ def handle_costs(records: List[Dict[str, Any]]) -> Dict[str, int]:
                 logger.warning("Skipping cost record: missing item_code or cost_date")
                 continue
 
+            avg_cost, last_cost = _extract_cost_fields(record)
+
             business_records.append({
                 "item_code": item_code,
-                "avg_cost": float(record.get("avg_cost", 0)),
-                "last_cost": float(record.get("last_cost", 0)),
+                "avg_cost": coerce_float(avg_cost),
+                "last_cost": coerce_float(last_cost),
                 "cost_date": cost_date
             })
 
@@ -585,8 +657,8 @@ def handle_pricing(records: List[Dict[str, Any]]) -> Dict[str, int]:
     return result
 
 
-# Mapping of data types to handler functions
-DATA_HANDLERS = {
+# Mapping of data types to handler functions (read-only, built once at import)
+DATA_HANDLERS = MappingProxyType({
     "warehouses_full": handle_warehouses,
     "vendors_full": handle_vendors,
     "items_full": handle_items,
@@ -595,4 +667,4 @@ DATA_HANDLERS = {
     "purchase_orders_incremental": handle_purchase_orders,
     "costs_incremental": handle_costs,
     "pricing_full": handle_pricing
-}
+})
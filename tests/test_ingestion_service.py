@@ -17,10 +17,15 @@ import os
 from dotenv import load_dotenv
 
 load_dotenv()
-from datetime import datetime
+from datetime import datetime, timezone
 from cryptography.fernet import Fernet
+from collections import namedtuple
+from types import MappingProxyType
 from typing import Dict, Any, List
 
+import handlers
+from handlers import DATA_HANDLERS, coerce_float
+
 
 # ============================================================================
 # Configuration (matching SAP_AGENT_RENDER_ENDPOINT_SPEC.md)
@@ -32,6 +37,19 @@ if not API_KEY:
 ENCRYPTION_KEY = "YOUR_ENCRYPTION_KEY_HERE"
 
 
+# Expected data type -> handler function name routing
+DATA_TYPE_HANDLER_NAMES = MappingProxyType({
+    "warehouses_full": "handle_warehouses",
+    "vendors_full": "handle_vendors",
+    "items_full": "handle_items",
+    "inventory_current_full": "handle_inventory",
+    "sales_orders_incremental": "handle_sales_orders",
+    "purchase_orders_incremental": "handle_purchase_orders",
+    "costs_incremental": "handle_costs",
+    "pricing_full": "handle_pricing"
+})
+
+
 # ============================================================================
 # Test Fixtures
 # ============================================================================
@@ -42,99 +60,112 @@ def cipher():
     return Fernet(ENCRYPTION_KEY.encode('utf-8'))
 
 
-@pytest.fixture
+# Sample records are session-scoped and read-only: they are built once and
+# shared by every test, so mutation raises instead of leaking between tests.
+# Records only read field-by-field are namedtuples; the warehouse sample stays
+# a mapping because its tests exercise dict.get() defaults.
+VendorRecord = namedtuple('VendorRecord', 'vendor_code vendor_name contact_person phone email is_active')
+ItemRecord = namedtuple('ItemRecord', 'item_code item_name item_group is_active')
+InventoryRecord = namedtuple('InventoryRecord', 'item_code warehouse_code quantity unit_price')
+SalesOrderRecord = namedtuple('SalesOrderRecord', 'order_id order_date customer_code item_code quantity unit_price line_total')
+PurchaseOrderRecord = namedtuple('PurchaseOrderRecord', 'order_id order_date vendor_code item_code quantity unit_price line_total')
+CostRecord = namedtuple('CostRecord', 'item_code avg_cost last_cost cost_date')
+PricingRecord = namedtuple('PricingRecord', 'item_code price_list price currency')
+
+
+@pytest.fixture(scope="session")
 def sample_warehouse_record():
     """Sample warehouse record."""
-    return {
+    return MappingProxyType({
         "warehouse_code": "01",
         "warehouse_name": "Main Warehouse",
         "is_active": 1
-    }
+    })
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_vendor_record():
     """Sample vendor record."""
-    return {
-        "vendor_code": "V001",
-        "vendor_name": "Acme Supplies",
-        "contact_person": "John Doe",
-        "phone": "555-1234",
-        "email": "john@acme.com",
-        "is_active": 1
-    }
+    return VendorRecord(
+        vendor_code="V001",
+        vendor_name="Acme Supplies",
+        contact_person="John Doe",
+        phone="555-1234",
+        email="john@acme.com",
+        is_active=1
+    )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_item_record():
     """Sample item record."""
-    return {
-        "item_code": "A00100",
-        "item_name": "Widget A",
-        "item_group": "Finished Goods",
-        "is_active": 1
-    }
+    return ItemRecord(
+        item_code="A00100",
+        item_name="Widget A",
+        item_group="Finished Goods",
+        is_active=1
+    )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_inventory_record():
     """Sample inventory record."""
-    return {
-        "item_code": "A00100",
-        "warehouse_code": "01",
-        "quantity": 500.00,
-        "unit_price": 25.50
-    }
+    return InventoryRecord(
+        item_code="A00100",
+        warehouse_code="01",
+        quantity=500.00,
+        unit_price=25.50
+    )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_sales_order_record():
     """Sample sales order record."""
-    return {
-        "order_id": 12345,
-        "order_date": "2025-01-27T00:00:00",
-        "customer_code": "C001",
-        "item_code": "A00100",
-        "quantity": 10,
-        "unit_price": 25.50,
-        "line_total": 255.00
-    }
-
-
-@pytest.fixture
+    return SalesOrderRecord(
+        order_id=12345,
+        order_date="2025-01-27T00:00:00",
+        customer_code="C001",
+        item_code="A00100",
+        quantity=10,
+        unit_price=25.50,
+        line_total=255.00
+    )
+
+
+@pytest.fixture(scope="session")
 def sample_purchase_order_record():
     """Sample purchase order record."""
-    return {
-        "order_id": 67890,
-        "order_date": "2025-01-27T00:00:00",
-        "vendor_code": "V001",
-        "item_code": "A00100",
-        "quantity": 100,
-        "unit_price": 15.00,
-        "line_total": 1500.00
-    }
-
-
-@pytest.fixture
+    return PurchaseOrderRecord(
+        order_id=67890,
+        order_date="2025-01-27T00:00:00",
+        vendor_code="V001",
+        item_code="A00100",
+        quantity=100,
+        unit_price=15.00,
+        line_total=1500.00
+    )
+
+
+@pytest.fixture(scope="session")
 def sample_cost_record():
     """Sample cost record."""
-    return {
-        "item_code": "A00100",
-        "avg_cost": 18.50,
-        "last_cost": 19.00,
-        "cost_date": "2025-01-27"
-    }
+    return CostRecord(
+        item_code="A00100",
+        avg_cost=18.50,
+        last_cost=19.00,
+        cost_date="2025-01-27"
+    )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_pricing_record():
     """Sample pricing record."""
-    return {
-        "item_code": "A00100",
-        "price_list": "1",
-        "price": 25.50,
-        "currency": "USD"
-    }
+    return PricingRecord(
+        item_code="A00100",
+        price_list="1",
+        price=25.50,
+        currency="USD"
+    )
 
 
 # ============================================================================
@@ -282,9 +313,9 @@ class TestVendorHandler:
 
     def test_vendor_record_extraction(self, sample_vendor_record):
         """Test extracting fields from vendor record."""
-        assert sample_vendor_record["vendor_code"] == "V001"
-        assert sample_vendor_record["vendor_name"] == "Acme Supplies"
-        assert sample_vendor_record["contact_person"] == "John Doe"
+        assert sample_vendor_record.vendor_code == "V001"
+        assert sample_vendor_record.vendor_name == "Acme Supplies"
+        assert sample_vendor_record.contact_person == "John Doe"
 
     def test_vendor_with_null_optional_fields(self):
         """Test vendor record with NULL optional fields."""
@@ -309,9 +340,9 @@ class TestItemHandler:
 
     def test_item_record_extraction(self, sample_item_record):
         """Test extracting fields from item record."""
-        assert sample_item_record["item_code"] == "A00100"
-        assert sample_item_record["item_name"] == "Widget A"
-        assert sample_item_record["item_group"] == "Finished Goods"
+        assert sample_item_record.item_code == "A00100"
+        assert sample_item_record.item_name == "Widget A"
+        assert sample_item_record.item_group == "Finished Goods"
 
     def test_item_with_special_characters(self):
         """Test item with special characters in name."""
@@ -334,10 +365,10 @@ class TestInventoryHandler:
 
     def test_inventory_record_extraction(self, sample_inventory_record):
         """Test extracting fields from inventory record."""
-        assert sample_inventory_record["item_code"] == "A00100"
-        assert sample_inventory_record["warehouse_code"] == "01"
-        assert sample_inventory_record["quantity"] == 500.00
-        assert sample_inventory_record["unit_price"] == 25.50
+        assert sample_inventory_record.item_code == "A00100"
+        assert sample_inventory_record.warehouse_code == "01"
+        assert sample_inventory_record.quantity == 500.00
+        assert sample_inventory_record.unit_price == 25.50
 
     def test_inventory_float_conversions(self):
         """Test float conversions for inventory fields."""
@@ -375,11 +406,11 @@ class TestSalesOrderHandler:
 
     def test_sales_order_record_extraction(self, sample_sales_order_record):
         """Test extracting fields from sales order record."""
-        assert sample_sales_order_record["order_id"] == 12345
-        assert sample_sales_order_record["order_date"] == "2025-01-27T00:00:00"
-        assert sample_sales_order_record["customer_code"] == "C001"
-        assert sample_sales_order_record["item_code"] == "A00100"
-        assert sample_sales_order_record["quantity"] == 10
+        assert sample_sales_order_record.order_id == 12345
+        assert sample_sales_order_record.order_date == "2025-01-27T00:00:00"
+        assert sample_sales_order_record.customer_code == "C001"
+        assert sample_sales_order_record.item_code == "A00100"
+        assert sample_sales_order_record.quantity == 10
 
     def test_sales_order_int_conversion(self):
         """Test integer conversions for sales order fields."""
@@ -395,18 +426,15 @@ class TestSalesOrderHandler:
         assert order_id == 12345
         assert quantity == 10
 
-    def test_sales_order_datetime_parsing(self):
+    @pytest.mark.parametrize("date_str,expected", [
+        ("2025-01-27T00:00:00", datetime(2025, 1, 27)),
+        ("2025-01-27T00:00:00+00:00", datetime(2025, 1, 27, tzinfo=timezone.utc)),
+        ("2025-01-27T00:00:00.123456+00:00", datetime(2025, 1, 27, 0, 0, 0, 123456, tzinfo=timezone.utc)),
+        ("2025-01-27T00:00:00Z", datetime(2025, 1, 27, tzinfo=timezone.utc))
+    ])
+    def test_sales_order_datetime_parsing(self, date_str, expected):
         """Test ISO 8601 datetime format."""
-        valid_dates = [
-            "2025-01-27T00:00:00",
-            "2025-01-27T00:00:00+00:00",
-            "2025-01-27T00:00:00.123456+00:00"
-        ]
-        for date_str in valid_dates:
-            try:
-                datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-            except ValueError as e:
-                pytest.fail(f"Failed to parse {date_str}: {e}")
+        assert datetime.fromisoformat(date_str) == expected
 
 
 # ============================================================================
@@ -418,11 +446,11 @@ class TestPurchaseOrderHandler:
 
     def test_purchase_order_record_extraction(self, sample_purchase_order_record):
         """Test extracting fields from purchase order record."""
-        assert sample_purchase_order_record["order_id"] == 67890
-        assert sample_purchase_order_record["order_date"] == "2025-01-27T00:00:00"
-        assert sample_purchase_order_record["vendor_code"] == "V001"
-        assert sample_purchase_order_record["item_code"] == "A00100"
-        assert sample_purchase_order_record["quantity"] == 100
+        assert sample_purchase_order_record.order_id == 67890
+        assert sample_purchase_order_record.order_date == "2025-01-27T00:00:00"
+        assert sample_purchase_order_record.vendor_code == "V001"
+        assert sample_purchase_order_record.item_code == "A00100"
+        assert sample_purchase_order_record.quantity == 100
 
 
 # ============================================================================
@@ -434,23 +462,24 @@ class TestCostHandler:
 
     def test_cost_record_extraction(self, sample_cost_record):
         """Test extracting fields from cost record."""
-        assert sample_cost_record["item_code"] == "A00100"
-        assert sample_cost_record["avg_cost"] == 18.50
-        assert sample_cost_record["last_cost"] == 19.00
-        assert sample_cost_record["cost_date"] == "2025-01-27"
-
-    def test_cost_date_parsing(self):
+        assert sample_cost_record.item_code == "A00100"
+        assert sample_cost_record.avg_cost == 18.50
+        assert sample_cost_record.last_cost == 19.00
+        assert sample_cost_record.cost_date == "2025-01-27"
+
+    @pytest.mark.parametrize("date_str,expected", [
+        ("2025-01-27", datetime(2025, 1, 27)),
+        ("2025-12-31", datetime(2025, 12, 31)),
+        ("2024-02-29", datetime(2024, 2, 29))  # Leap year
+    ])
+    def test_cost_date_parsing(self, date_str, expected):
         """Test ISO 8601 date format."""
-        valid_dates = [
-            "2025-01-27",
-            "2025-12-31",
-            "2024-02-29"  # Leap year
-        ]
-        for date_str in valid_dates:
-            try:
-                datetime.fromisoformat(date_str)
-            except ValueError as e:
-                pytest.fail(f"Failed to parse {date_str}: {e}")
+        assert datetime.fromisoformat(date_str) == expected
+
+    def test_cost_date_rejects_invalid_day(self):
+        """Test that a non-existent date is rejected."""
+        with pytest.raises(ValueError):
+            datetime.fromisoformat("2025-02-29")
 
 
 # ============================================================================
@@ -462,17 +491,17 @@ class TestPricingHandler:
 
     def test_pricing_record_extraction(self, sample_pricing_record):
         """Test extracting fields from pricing record."""
-        assert sample_pricing_record["item_code"] == "A00100"
-        assert sample_pricing_record["price_list"] == "1"
-        assert sample_pricing_record["price"] == 25.50
-        assert sample_pricing_record["currency"] == "USD"
+        assert sample_pricing_record.item_code == "A00100"
+        assert sample_pricing_record.price_list == "1"
+        assert sample_pricing_record.price == 25.50
+        assert sample_pricing_record.currency == "USD"
 
     def test_pricing_composite_key(self, sample_pricing_record):
         """Test composite primary key for pricing."""
         composite_key = (
-            sample_pricing_record["item_code"],
-            sample_pricing_record["price_list"],
-            sample_pricing_record["currency"]
+            sample_pricing_record.item_code,
+            sample_pricing_record.price_list,
+            sample_pricing_record.currency
         )
         assert composite_key == ("A00100", "1", "USD")
 
@@ -541,19 +570,11 @@ class TestDataTypeHandlers:
 
     def test_data_type_handler_mapping(self):
         """Test data type to handler mapping."""
-        mapping = {
-            "warehouses_full": "handle_warehouses",
-            "vendors_full": "handle_vendors",
-            "items_full": "handle_items",
-            "inventory_current_full": "handle_inventory",
-            "sales_orders_incremental": "handle_sales_orders",
-            "purchase_orders_incremental": "handle_purchase_orders",
-            "costs_incremental": "handle_costs",
-            "pricing_full": "handle_pricing"
-        }
-        assert len(mapping) == 8
-        for data_type, handler in mapping.items():
-            assert "handle_" in handler
+        assert len(DATA_TYPE_HANDLER_NAMES) == 8
+        assert {
+            data_type: handler.__name__
+            for data_type, handler in DATA_HANDLERS.items()
+        } == DATA_TYPE_HANDLER_NAMES
 
 
 # ============================================================================
@@ -604,6 +625,82 @@ class TestNullHandling:
             avg_cost_float = 0.0
         assert avg_cost_float == 0.0
 
+    def test_inventory_handler_stores_null_numbers_as_zero(self, monkeypatch):
+        """Test handle_inventory stores NULL/empty quantities and cost as 0.0."""
+        upserted = []
+        monkeypatch.setattr(handlers, "get_valid_warehouse_codes", lambda: {"01"})
+        monkeypatch.setattr(
+            handlers, "upsert_inventory",
+            lambda records: upserted.extend(records) or {'processed': len(records), 'failed': 0}
+        )
+
+        result = handlers.handle_inventory([{
+            "item_code": "A00100",
+            "warehouse_code": "01",
+            "on_hand_qty": None,
+            "on_order_qty": "",
+            "committed_qty": None,
+            "unit_cost": None
+        }])
+
+        assert result['processed'] == 1
+        assert result['failed'] == 0
+        assert upserted == [{
+            "item_code": "A00100",
+            "warehouse_code": "01",
+            "on_hand_qty": 0.0,
+            "on_order_qty": 0.0,
+            "committed_qty": 0.0,
+            "available_qty": 0.0,
+            "unit_cost": 0.0
+        }]
+
+    def test_cost_handler_stores_null_costs_as_zero(self, monkeypatch):
+        """Test handle_costs stores NULL/empty costs as 0.0."""
+        upserted = []
+        monkeypatch.setattr(
+            handlers, "upsert_costs",
+            lambda records: upserted.extend(records) or {'processed': len(records), 'failed': 0}
+        )
+
+        handlers.handle_costs([{
+            "item_code": "A00100",
+            "avg_cost": None,
+            "last_cost": "",
+            "cost_date": "2025-01-27"
+        }])
+
+        assert upserted == [{
+            "item_code": "A00100",
+            "avg_cost": 0.0,
+            "last_cost": 0.0,
+            "cost_date": "2025-01-27"
+        }]
+
+    def test_sales_order_handler_rejects_null_numbers(self, monkeypatch):
+        """Test handle_sales_orders still rejects a NULL quantity, unlike inventory/costs."""
+        upserted = []
+        monkeypatch.setattr(handlers, "get_valid_warehouse_codes", lambda: {"01"})
+        monkeypatch.setattr(
+            handlers, "upsert_sales_orders",
+            lambda records: upserted.extend(records) or {'processed': len(records), 'failed': 0}
+        )
+
+        result = handlers.handle_sales_orders([{
+            "order_id": 12345,
+            "order_date": "2025-01-27T00:00:00",
+            "customer_code": "C001",
+            "item_code": "A00100",
+            "warehouse_code": "01",
+            "quantity": None,
+            "unit_price": 25.00,
+            "line_total": 250.00
+        }])
+
+        assert upserted == []
+        assert result['processed'] == 0
+        assert result['failed'] == 1
+
 
 # ============================================================================
 # Test: Data Type Conversions
@@ -637,9 +734,9 @@ class TestDataTypeConversions:
 
     def test_none_to_zero(self):
         """Test None treated as zero for numeric fields."""
-        quantity = None
-        quantity = float(quantity or 0)
-        assert quantity == 0.0
+        assert coerce_float(None) == 0.0
+        assert coerce_float(0) == 0.0
+        assert coerce_float(0.0) == 0.0
 
 
 # ============================================================================
@@ -661,9 +758,11 @@ class TestEdgeCases:
 
     def test_large_record_count(self):
         """Test handling of large record count (5000 records)."""
+        item_codes = map("A{:05d}".format, range(5000))
+        item_names = map("Item {}".format, range(5000))
         records = [
-            {"item_code": f"A{i:05d}", "item_name": f"Item {i}"}
-            for i in range(5000)
+            {"item_code": code, "item_name": name}
+            for code, name in zip(item_codes, item_names)
         ]
         assert len(records) == 5000
 
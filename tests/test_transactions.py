@@ -6,6 +6,7 @@ Created: 2026-01-31
 Author: Distributed Systems Reliability Engineer
 """
 
+import asyncio
 import pytest
 import sys
 import os
@@ -14,25 +15,42 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from transaction_manager import (
+    AdaptiveBatcher,
     TransactionManager,
     TransactionBatchResult,
+    _invalid_indices,
     validate_warehouse_record,
     validate_inventory_record,
     validate_sales_order_record
 )
 
 
+@pytest.fixture(scope="session")
+def synthetic_warehouse_records():
+    """Read-only warehouse records shared across tests; slice what you need."""
+    return tuple(
+        {'warehouse_code': f'TEST-{i}', 'warehouse_name': f'Warehouse {i}'}
+        for i in range(32)
+    )
+
+
+@pytest.fixture(scope="session")
+def synthetic_inventory_records():
+    """Read-only inventory records shared across tests; slice what you need."""
+    return tuple(
+        {'item_code': f'ITEM-{i}', 'warehouse_code': 'WH-001', 'on_hand_qty': 100}
+        for i in range(32)
+    )
+
+
 class TestTransactionManager:
     """Test suite for transaction manager."""
 
-    def test_batch_with_all_valid_records(self):
+    def test_batch_with_all_valid_records(self, synthetic_warehouse_records):
         """Test batch processing with all valid records."""
         manager = TransactionManager()
 
-        records = [
-            {'warehouse_code': f'TEST-{i}', 'warehouse_name': f'Warehouse {i}'}
-            for i in range(10)
-        ]
+        records = synthetic_warehouse_records[:10]
 
         def mock_operation(batch):
             return {'processed': len(batch), 'failed': 0}
@@ -74,14 +92,11 @@ class TestTransactionManager:
         assert result.is_partial is True
         assert len(result.errors) == 2
 
-    def test_batch_with_processing_failures(self):
+    def test_batch_with_processing_failures(self, synthetic_inventory_records):
         """Test batch processing with some records failing during processing."""
         manager = TransactionManager()
 
-        records = [
-            {'item_code': f'ITEM-{i}', 'warehouse_code': 'WH-001', 'on_hand_qty': 100}
-            for i in range(10)
-        ]
+        records = synthetic_inventory_records[:10]
 
         def failing_operation(batch):
             # Fail the last record in batch
@@ -98,14 +113,136 @@ class TestTransactionManager:
         assert result.failed > 0
         assert result.is_partial is True
 
-    def test_transactional_batch_all_or_nothing(self):
+    def test_batch_packs_by_payload_size(self, synthetic_warehouse_records):
+        """Test max_payload_bytes sends one call when everything fits, and splits when it doesn't."""
+        manager = TransactionManager()
+
+        records = synthetic_warehouse_records[:20]
+        batch_sizes = []
+
+        def mock_operation(batch):
+            batch_sizes.append(len(batch))
+            return {'processed': len(batch), 'failed': 0}
+
+        result = manager.execute_batch(
+            records=records,
+            operation_func=mock_operation,
+            validator_func=validate_warehouse_record,
+            batch_size=5,
+            max_payload_bytes=5 * 1024 * 1024
+        )
+
+        assert result.processed == 20
+        assert batch_sizes == [20]
+
+        batch_sizes.clear()
+        result = manager.execute_batch(
+            records=records,
+            operation_func=mock_operation,
+            validator_func=validate_warehouse_record,
+            max_payload_bytes=300
+        )
+
+        assert result.processed == 20
+        assert len(batch_sizes) > 1
+        assert sum(batch_sizes) == 20
+
+    def test_batch_payload_size_handles_wide_integers(self):
+        """Test payload sizing accepts integers wider than 64 bits, as json.loads decodes them."""
+        manager = TransactionManager()
+
+        result = manager.execute_batch(
+            records=[{'warehouse_code': 'A', 'n': 2 ** 70}],
+            operation_func=lambda batch: {'processed': len(batch), 'failed': 0},
+            max_payload_bytes=1024
+        )
+
+        assert result.processed == 1
+        assert result.errors == []
+
+    def test_adaptive_batch_size_follows_timing(self, synthetic_warehouse_records):
+        """Test batch_size=None grows batches when records are cheap to process."""
+        manager = TransactionManager()
+        manager.batcher = AdaptiveBatcher(target_batch_ms=1000.0, min_size=2, max_size=16, initial_size=2)
+
+        records = synthetic_warehouse_records
+        batch_sizes = []
+
+        def mock_operation(batch):
+            batch_sizes.append(len(batch))
+            return {'processed': len(batch), 'failed': 0}
+
+        result = manager.execute_batch(
+            records=records,
+            operation_func=mock_operation,
+            validator_func=validate_warehouse_record,
+            batch_size=None
+        )
+
+        assert result.processed == len(records)
+        assert batch_sizes[0] == 2
+        assert batch_sizes[1] == 16
+        assert manager.batcher.ms_per_record is not None
+
+    def test_stream_batch_from_generator(self, synthetic_warehouse_records):
+        """Test streaming fills full batches of valid records from a generator."""
+        manager = TransactionManager()
+
+        def records():
+            for i, record in enumerate(synthetic_warehouse_records[:20]):
+                yield record
+                if i % 5 == 0:
+                    yield {'warehouse_name': 'Invalid - no code'}
+
+        batch_sizes = []
+
+        def mock_operation(batch):
+            batch_sizes.append(len(batch))
+            return {'processed': len(batch), 'failed': 0}
+
+        result = manager.execute_batch_stream(
+            records=records(),
+            operation_func=mock_operation,
+            validator_func=validate_warehouse_record,
+            batch_size=6
+        )
+
+        assert result.processed == 20
+        assert result.failed == 4
+        assert batch_sizes == [6, 6, 6, 2]
+
+    def test_async_batch_limits_inflight(self, synthetic_warehouse_records):
+        """Test async batches run concurrently but never more than max_inflight at once."""
+        manager = TransactionManager()
+
+        records = synthetic_warehouse_records[:20]
+        inflight = [0, 0]  # current, peak
+
+        async def mock_operation(batch):
+            inflight[0] += 1
+            inflight[1] = max(inflight[1], inflight[0])
+            await asyncio.sleep(0.01)
+            inflight[0] -= 1
+            return {'processed': len(batch), 'failed': 0}
+
+        result = asyncio.run(manager.execute_batch_async(
+            records=records,
+            operation_func=mock_operation,
+            validator_func=validate_warehouse_record,
+            batch_size=2,
+            max_inflight=3
+        ))
+
+        assert result.processed == 20
+        assert result.failed == 0
+        assert result.is_partial is False
+        assert inflight[1] == 3
+
+    def test_transactional_batch_all_or_nothing(self, synthetic_warehouse_records):
         """Test transactional batch fails completely if any record fails."""
         manager = TransactionManager()
 
-        records = [
-            {'warehouse_code': f'TEST-{i}', 'warehouse_name': f'Warehouse {i}'}
-            for i in range(5)
-        ]
+        records = synthetic_warehouse_records[:5]
 
         call_count = [0]
 
@@ -127,14 +264,11 @@ class TestTransactionManager:
         assert result.processed == 0
         assert result.is_partial is False
 
-    def test_transactional_batch_all_succeed(self):
+    def test_transactional_batch_all_succeed(self, synthetic_warehouse_records):
         """Test transactional batch succeeds when all records are valid."""
         manager = TransactionManager()
 
-        records = [
-            {'warehouse_code': f'TEST-{i}', 'warehouse_name': f'Warehouse {i}'}
-            for i in range(5)
-        ]
+        records = synthetic_warehouse_records[:5]
 
         def mock_operation(record):
             return {'processed': 1, 'failed': 0}
@@ -149,6 +283,86 @@ class TestTransactionManager:
         assert result.failed == 0
         assert result.is_partial is False
 
+    def test_transactional_batch_operation_raises(self, synthetic_warehouse_records):
+        """Test an exception fails the batch and is_partial reflects earlier records."""
+        manager = TransactionManager()
+
+        records = synthetic_warehouse_records[:5]
+
+        def raise_on(position):
+            calls = []
+
+            def operation(record):
+                calls.append(record)
+                if len(calls) == position:
+                    raise RuntimeError("connection lost")
+                return {'processed': 1, 'failed': 0}
+            return operation
+
+        result = manager.execute_transactional_batch(records=records, operation_func=raise_on(3))
+        assert result.failed == 5
+        assert result.processed == 0
+        assert result.is_partial is True
+        assert result.errors[0]['error'] == "connection lost"
+
+        result = manager.execute_transactional_batch(records=records, operation_func=raise_on(1))
+        assert result.failed == 5
+        assert result.is_partial is False
+
+    def test_transactional_batch_invalid_record_skips_processing(self, synthetic_warehouse_records):
+        """Test a single invalid record fails the batch before any operation call."""
+        manager = TransactionManager()
+
+        records = list(synthetic_warehouse_records[:5]) + [{'warehouse_name': 'no code'}]
+        calls = []
+
+        result = manager.execute_transactional_batch(
+            records=records,
+            operation_func=lambda record: calls.append(record) or {'processed': 1, 'failed': 0},
+            validator_func=validate_warehouse_record
+        )
+
+        assert calls == []
+        assert result.failed == 6
+        assert result.processed == 0
+        assert 'Missing warehouse_code' in result.errors[0]['error']
+
+    def test_transactional_batch_bulk_operation(self, synthetic_warehouse_records):
+        """Test bulk_operation_func replaces per-record calls with one call."""
+        manager = TransactionManager()
+
+        records = synthetic_warehouse_records[:5]
+        calls = []
+
+        def per_record_operation(record):
+            raise AssertionError("per-record operation should not be called")
+
+        def bulk_operation(batch):
+            calls.append(len(batch))
+            return {'processed': len(batch), 'failed': 0}
+
+        result = manager.execute_transactional_batch(
+            records=records,
+            operation_func=per_record_operation,
+            validator_func=validate_warehouse_record,
+            bulk_operation_func=bulk_operation
+        )
+
+        assert calls == [5]
+        assert result.processed == 5
+        assert result.failed == 0
+
+        result = manager.execute_transactional_batch(
+            records=records,
+            operation_func=per_record_operation,
+            validator_func=validate_warehouse_record,
+            bulk_operation_func=lambda batch: {'processed': 0, 'failed': 1}
+        )
+
+        assert result.processed == 0
+        assert result.failed == 5
+        assert result.is_partial is False
+
     def test_inventory_validation_with_invalid_quantity(self):
         """Test inventory record validation rejects invalid quantities."""
         # Invalid quantity (non-numeric)
@@ -170,6 +384,73 @@ class TestTransactionManager:
         assert is_valid is False
         assert 'must be integer' in error
 
+    @pytest.mark.parametrize("validator_func,records", [
+        (validate_inventory_record, [
+            {'id': 0, 'item_code': 'ITEM-0', 'warehouse_code': 'WH-001', 'on_hand_qty': 100},
+            {'id': 1, 'item_code': 'ITEM-1', 'warehouse_code': 'WH-001', 'on_hand_qty': '12.5'},
+            {'id': 2, 'item_code': 'ITEM-2', 'warehouse_code': 'WH-001', 'on_hand_qty': 'abc'},
+            {'id': 3, 'warehouse_code': 'WH-001', 'on_hand_qty': 5},
+            {'id': 4, 'item_code': 'ITEM-4', 'warehouse_code': 'WH-001', 'on_hand_qty': 7.25},
+            {'id': 5, 'item_code': 'ITEM-5', 'warehouse_code': 'WH 001', 'on_hand_qty': 1},
+            {'id': 6, 'item_code': 'ITEM-6', 'warehouse_code': 'WH-001'},
+            {'id': 7, 'item_code': 'ITEM-7', 'warehouse_code': 'WH-001', 'on_hand_qty': '3'},
+        ]),
+        (validate_sales_order_record, [
+            {'id': 0, 'order_id': 1001},
+            {'id': 1, 'order_id': '1002'},
+            {'id': 2, 'order_id': 'abc'},
+            {'id': 3, 'order_id': None},
+            {'id': 4, 'order_id': '10.5'},
+            {'id': 5, 'order_id': 1005},
+        ]),
+    ])
+    def test_column_prevalidation_matches_per_record(self, validator_func, records):
+        """Test the column-wise pre-pass keeps the same records, in order, as per-record validation."""
+        outcomes = [validator_func(record) for record in records]
+        expected_valid = [record for record, (is_valid, _) in zip(records, outcomes) if is_valid]
+        expected_errors = [error for is_valid, error in outcomes if not is_valid]
+        assert expected_valid and expected_errors
+
+        # The column-wise pass ran (no fallback) and flagged every invalid record
+        flagged = _invalid_indices(validator_func, records)
+        assert flagged is not None
+        assert {i for i, (is_valid, _) in enumerate(outcomes) if not is_valid} <= set(flagged)
+
+        manager = TransactionManager()
+        batches = []
+
+        result = manager.execute_batch(
+            records=records,
+            operation_func=lambda batch: batches.append(batch) or {'processed': len(batch), 'failed': 0},
+            validator_func=validator_func,
+            batch_size=3
+        )
+
+        assert [record for batch in batches for record in batch] == expected_valid
+        assert result.processed == len(expected_valid)
+        assert result.failed == len(expected_errors)
+        assert [error['error'] for error in result.errors] == expected_errors
+
+        result = manager.execute_transactional_batch(
+            records=records,
+            operation_func=lambda record: {'processed': 1, 'failed': 0},
+            validator_func=validator_func
+        )
+
+        assert result.processed == 0
+        assert result.failed == len(records)
+        assert result.errors[0]['error'] == f"Validation failed for all records: {expected_errors[0]}"
+
+        processed = []
+        result = manager.execute_transactional_batch(
+            records=expected_valid,
+            operation_func=lambda record: processed.append(record) or {'processed': 1, 'failed': 0},
+            validator_func=validator_func
+        )
+
+        assert processed == expected_valid
+        assert result.processed == len(expected_valid)
+
     def test_empty_batch(self):
         """Test that empty batch returns zero results."""
         manager = TransactionManager()
@@ -217,6 +498,25 @@ class TestTransactionBatchResult:
 
         assert len(result_dict['errors']) == 10
 
+    def test_validation_errors_stop_formatting_records_at_cap(self):
+        """Test records past the error cap are counted but not stringified."""
+        formatted = [0]
+
+        class CountingRecord(dict):
+            def __repr__(self):
+                formatted[0] += 1
+                return dict.__repr__(self)
+
+        result = TransactionManager().execute_batch(
+            records=[CountingRecord(warehouse_name='no code') for _ in range(25)],
+            operation_func=lambda batch: {'processed': len(batch), 'failed': 0},
+            validator_func=validate_warehouse_record
+        )
+
+        assert result.failed == 25
+        assert len(result.errors) == 10
+        assert formatted[0] == 10
+
 
 class TestValidationFunctions:
     """Test suite for validation functions."""
@@ -240,6 +540,54 @@ class TestValidationFunctions:
         assert is_valid is False
         assert 'warehouse_code' in error
 
+    def test_validate_warehouse_record_invalid_code_format(self):
+        """Test warehouse code with unsupported characters fails validation."""
+        is_valid, error = validate_warehouse_record({
+            'warehouse_code': 'WH 001!',
+            'warehouse_name': 'Test Warehouse'
+        })
+
+        assert is_valid is False
+        assert 'warehouse_code' in error
+
+    def test_validate_warehouse_record_rejects_trailing_newline(self):
+        """Test a trailing newline fails both per-record and column-wise validation."""
+        is_valid, error = validate_warehouse_record({'warehouse_code': 'WH01\n'})
+
+        assert is_valid is False
+        assert 'warehouse_code' in error
+
+        manager = TransactionManager()
+        result = manager.execute_batch(
+            records=[{'warehouse_code': 'WH01'}, {'warehouse_code': 'WH01\n'}],
+            operation_func=lambda batch: {'processed': len(batch), 'failed': 0},
+            validator_func=validate_warehouse_record
+        )
+
+        assert result.processed == 1
+        assert result.failed == 1
+
+    def test_validate_inventory_record_code_format(self):
+        """Test inventory checks the warehouse code format but not the item code's."""
+        is_valid, error = validate_inventory_record({
+            'item_code': 'ITEM 001 WITH A DESCRIPTIVE SUFFIX LONGER THAN 32',
+            'warehouse_code': 'WH-001',
+            'on_hand_qty': 100
+        })
+
+        assert is_valid is True
+        assert error is None
+
+        for warehouse_code in ('WH 001', 'W' * 21):
+            is_valid, error = validate_inventory_record({
+                'item_code': 'ITEM-001',
+                'warehouse_code': warehouse_code,
+                'on_hand_qty': 100
+            })
+
+            assert is_valid is False
+            assert 'warehouse_code' in error
+
     def test_validate_inventory_record_valid(self):
         """Test valid inventory record passes validation."""
         is_valid, error = validate_inventory_record({
@@ -6,17 +6,181 @@ Created: 2026-01-31
 Author: Distributed Systems Reliability Engineer
 """
 
+import asyncio
 import logging
-from typing import Dict, List, Any, Callable, Optional, Tuple
+import re
+import reprlib
+import sys
+import time
+from collections import Counter
+from operator import itemgetter
+from typing import Dict, List, Any, Awaitable, Callable, Iterable, Iterator, Optional, Sequence, Tuple
 from datetime import datetime
 import json
+from itertools import islice
 
 logger = logging.getLogger(__name__)
 
+# Allowed shape for SAP warehouse codes, up to the VARCHAR(20) column width
+# (see WAREHOUSE_VALIDATION_SPEC.md); applied with fullmatch, so "WH01\n" fails
+CODE_PATTERN = re.compile(r'[A-Za-z0-9._-]{1,20}')
+
+
+class _RecordRepr(reprlib.Repr):
+    """
+    Bounded repr for failing records in error reports.
+
+    Walks only as much of the record as it prints instead of stringifying the
+    whole dict and truncating. Unlike reprlib's default, dicts keep insertion
+    order and are never sorted in full.
+    """
+
+    def repr_dict(self, x, level):
+        if not x:
+            return '{}'
+        if level <= 0:
+            return '{...}'
+        repr1 = self.repr1
+        pieces = [
+            f"{repr1(key, level - 1)}: {repr1(value, level - 1)}"
+            for key, value in islice(x.items(), self.maxdict)
+        ]
+        if len(x) > self.maxdict:
+            pieces.append('...')
+        return '{' + ', '.join(pieces) + '}'
+
+
+_record_repr = _RecordRepr()
+_record_repr.maxdict = 5
+_record_repr.maxstring = 40
+
+# Exact types accepted as numeric without attempting a float() conversion
+_NUMERIC_TYPES = frozenset((int, float))
+_INTEGER_TYPES = frozenset((int,))
+
+
+def _is_numeric(value: Any) -> bool:
+    """Return True if value is numeric or convertible to float."""
+    if type(value) in _NUMERIC_TYPES:
+        return True
+    try:
+        float(value)
+    except (ValueError, TypeError):
+        return False
+    return True
+
+
+def _is_integer(value: Any) -> bool:
+    """Return True if value is an int or convertible to int."""
+    if type(value) is int:
+        return True
+    try:
+        int(value)
+    except (ValueError, TypeError):
+        return False
+    return True
+
+
+# Column-wise (dict-of-arrays) batch checks, keyed by the record validator they mirror
+_COLUMN_VALIDATORS: Dict[Callable, Callable[[Sequence[Dict[str, Any]]], List[int]]] = {}
+
+
+def _and_mask(mask: List[bool], passed: List[Any]) -> List[bool]:
+    """Combine a running validity mask with one column's pass/fail results."""
+    return [ok and bool(value) for ok, value in zip(mask, passed)]
+
+
+def _invalid_indices(validator_func: Callable, records: Sequence[Dict[str, Any]]) -> Optional[List[int]]:
+    """
+    Find the records that fail validator_func using a column-wise pass.
+
+    Returns the ascending indices of failing records, or None when no column
+    check is registered for the validator or the check raises, in which case
+    callers validate every record individually.
+    """
+    invalid_indices = _COLUMN_VALIDATORS.get(validator_func)
+    if invalid_indices is None:
+        return None
+    try:
+        return invalid_indices(records)
+    except Exception:
+        return None
+
+
+def _payload_batches(records: List[Dict[str, Any]], max_payload_bytes: int) -> List[List[Dict[str, Any]]]:
+    """
+    Greedily pack records into the largest batches whose JSON array stays within max_payload_bytes.
+
+    A record that is larger than the limit on its own is sent as a batch of one.
+    """
+    batches = []
+    batch = []
+    batch_bytes = 2  # enclosing []
+    for record in records:
+        record_bytes = len(json.dumps(record, default=str).encode('utf-8')) + 1  # trailing comma
+        if batch and batch_bytes + record_bytes > max_payload_bytes:
+            batches.append(batch)
+            batch = []
+            batch_bytes = 2
+        batch.append(record)
+        batch_bytes += record_bytes
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class AdaptiveBatcher:
+    """
+    Chooses batch sizes that keep each operation_func call near target_batch_ms.
+
+    Keeps an exponential moving average of milliseconds per record across
+    batches and sizes the next batch as target_batch_ms / ms_per_record,
+    clamped to [min_size, max_size].
+    """
+
+    __slots__ = ('target_batch_ms', 'min_size', 'max_size', 'initial_size', 'smoothing', 'ms_per_record')
+
+    def __init__(
+        self,
+        target_batch_ms: float = 300.0,
+        min_size: int = 50,
+        max_size: int = 5000,
+        initial_size: int = 100,
+        smoothing: float = 0.3
+    ):
+        self.target_batch_ms = target_batch_ms
+        self.min_size = min_size
+        self.max_size = max_size
+        self.initial_size = initial_size
+        self.smoothing = smoothing
+        self.ms_per_record: Optional[float] = None
+
+    def next_size(self) -> int:
+        """Return the batch size to use for the next call."""
+        if not self.ms_per_record:
+            return self.initial_size
+        size = int(self.target_batch_ms / self.ms_per_record)
+        return min(max(size, self.min_size), self.max_size)
+
+    def record(self, elapsed_ms: float, batch_len: int) -> None:
+        """Feed back how long a batch of batch_len records took."""
+        if batch_len <= 0:
+            return
+        sample = elapsed_ms / batch_len
+        if self.ms_per_record is None:
+            self.ms_per_record = sample
+        else:
+            self.ms_per_record += self.smoothing * (sample - self.ms_per_record)
+
 
 class TransactionBatchResult:
     """Result of a batch transaction operation."""
 
+    __slots__ = ('processed', 'failed', 'errors', 'is_partial')
+
+    # Only the first MAX_ERRORS errors are kept for review
+    MAX_ERRORS = 10
+
     def __init__(
         self,
         processed: int = 0,
@@ -26,16 +190,26 @@ class TransactionBatchResult:
     ):
         self.processed = processed
         self.failed = failed
-        self.errors = errors or []
+        self.errors = errors[:self.MAX_ERRORS] if errors else []
         self.is_partial = is_partial
 
+    @property
+    def errors_full(self) -> bool:
+        """True once MAX_ERRORS errors are kept; callers can skip building further error dicts."""
+        return len(self.errors) >= self.MAX_ERRORS
+
+    def add_error(self, error: Dict[str, Any]) -> None:
+        """Record an error, dropping it once MAX_ERRORS have been kept."""
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append(error)
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON response."""
         return {
             'processed': self.processed,
             'failed': self.failed,
             'is_partial': self.is_partial,
-            'errors': self.errors[:10]  # Only first 10 errors
+            'errors': list(self.errors)
         }
 
 
@@ -56,6 +230,8 @@ class TransactionManager:
 
     def __init__(self):
         """Initialize transaction manager."""
+        # Shared across execute_batch calls so batch sizing keeps learning
+        self.batcher = AdaptiveBatcher()
         logger.info("Transaction manager initialized")
 
     def execute_batch(
@@ -63,7 +239,8 @@ class TransactionManager:
         records: List[Dict[str, Any]],
         operation_func: Callable[[List[Dict[str, Any]]], Dict[str, int]],
         validator_func: Optional[Callable[[Dict[str, Any]], Tuple[bool, Optional[str]]]] = None,
-        batch_size: int = 100
+        batch_size: Optional[int] = 100,
+        max_payload_bytes: Optional[int] = None
     ) -> TransactionBatchResult:
         """
         Execute a batch operation with transactional semantics.
@@ -72,7 +249,10 @@ class TransactionManager:
             records: List of records to process
             operation_func: Function that processes records (should return dict with processed/failed)
             validator_func: Optional validation function (record) -> (is_valid, error_message)
-            batch_size: Process records in batches of this size
+            batch_size: Process records in batches of this size; None sizes each batch
+                adaptively from the time taken by earlier batches (see AdaptiveBatcher)
+            max_payload_bytes: If set, ignore batch_size and send the largest batches whose
+                JSON payload fits in this many bytes (one call when everything fits)
 
         Returns:
             TransactionBatchResult with detailed statistics
@@ -81,35 +261,10 @@ class TransactionManager:
             return TransactionBatchResult()
 
         result = TransactionBatchResult()
-        valid_records = []
 
         # Phase 1: Pre-validate all records
         logger.info(f"Phase 1: Validating {len(records)} records")
-
-        for record in records:
-            try:
-                if validator_func:
-                    is_valid, error_msg = validator_func(record)
-                    if not is_valid:
-                        result.failed += 1
-                        result.errors.append({
-                            'record': str(record)[:200],  # Truncate for logging
-                            'error': error_msg,
-                            'phase': 'validation'
-                        })
-                        logger.warning(f"Validation failed: {error_msg}")
-                        continue
-
-                valid_records.append(record)
-
-            except Exception as e:
-                result.failed += 1
-                result.errors.append({
-                    'record': str(record)[:200],
-                    'error': str(e),
-                    'phase': 'validation'
-                })
-                logger.error(f"Validation error: {str(e)}")
+        valid_records = self._prevalidate(records, validator_func, result)
 
         if not valid_records:
             logger.error("No valid records after validation phase")
@@ -119,13 +274,19 @@ class TransactionManager:
         logger.info(f"Phase 1 complete: {len(valid_records)} valid, {result.failed} invalid")
 
         # Phase 2: Process valid records in batches
-        logger.info(f"Phase 2: Processing {len(valid_records)} valid records in batches of {batch_size}")
-
         try:
+            if batch_size is None and not max_payload_bytes:
+                logger.info(f"Phase 2: Processing {len(valid_records)} valid records in adaptive batches")
+                batches = self._adaptive_batches(valid_records)
+                batch_count = None
+            else:
+                batches = self._split_batches(valid_records, batch_size, max_payload_bytes)
+                batch_count = len(batches)
+
             # Process in batches
-            for i in range(0, len(valid_records), batch_size):
-                batch = valid_records[i:i + batch_size]
-                logger.info(f"Processing batch {i // batch_size + 1}/{(len(valid_records) + batch_size - 1) // batch_size}")
+            for batch_number, batch in enumerate(batches, 1):
+                if batch_count:
+                    logger.info("Processing batch %d/%d", batch_number, batch_count)
 
                 batch_result = operation_func(batch)
                 result.processed += batch_result.get('processed', 0)
@@ -139,7 +300,149 @@ class TransactionManager:
 
         except Exception as e:
             logger.error(f"Batch processing error: {str(e)}", exc_info=True)
-            result.errors.append({
+            result.add_error({
+                'error': str(e),
+                'phase': 'processing'
+            })
+            result.is_partial = result.processed > 0
+
+        return result
+
+    async def execute_batch_async(
+        self,
+        records: List[Dict[str, Any]],
+        operation_func: Callable[[List[Dict[str, Any]]], Awaitable[Dict[str, int]]],
+        validator_func: Optional[Callable[[Dict[str, Any]], Tuple[bool, Optional[str]]]] = None,
+        batch_size: Optional[int] = 100,
+        max_payload_bytes: Optional[int] = None,
+        max_inflight: int = 8
+    ) -> TransactionBatchResult:
+        """
+        Execute a batch operation like execute_batch, submitting batches concurrently.
+
+        Validation is identical to execute_batch. In Phase 2 up to max_inflight
+        batches are awaited at once; a batch that raises is recorded as an error
+        and does not stop the others.
+
+        Args:
+            records: List of records to process
+            operation_func: Coroutine function that processes records (returns dict with processed/failed)
+            validator_func: Optional validation function (record) -> (is_valid, error_message)
+            batch_size: Process records in batches of this size; None uses the adaptive batcher's current size
+            max_payload_bytes: If set, ignore batch_size and pack batches by JSON payload size
+            max_inflight: Maximum number of batches submitted at the same time
+
+        Returns:
+            TransactionBatchResult with detailed statistics
+        """
+        if not records:
+            return TransactionBatchResult()
+
+        result = TransactionBatchResult()
+
+        # Phase 1: Pre-validate all records
+        logger.info(f"Phase 1: Validating {len(records)} records")
+        valid_records = self._prevalidate(records, validator_func, result)
+
+        if not valid_records:
+            logger.error("No valid records after validation phase")
+            return result
+
+        logger.info(f"Phase 1 complete: {len(valid_records)} valid, {result.failed} invalid")
+
+        # Phase 2: Submit batches concurrently, at most max_inflight at a time
+        batches = self._split_batches(valid_records, batch_size, max_payload_bytes)
+        semaphore = asyncio.Semaphore(max_inflight)
+
+        async def run_batch(batch: List[Dict[str, Any]]) -> Dict[str, int]:
+            async with semaphore:
+                return await operation_func(batch)
+
+        batch_results = await asyncio.gather(
+            *(run_batch(batch) for batch in batches),
+            return_exceptions=True
+        )
+
+        completed = [r for r in batch_results if not isinstance(r, BaseException)]
+        raised = [r for r in batch_results if isinstance(r, BaseException)]
+
+        for error in raised:
+            logger.error(f"Batch processing error: {str(error)}")
+            result.add_error({
+                'error': str(error),
+                'phase': 'processing'
+            })
+
+        # Aggregate once after gather rather than accumulating per batch
+        batch_failed = sum([r.get('failed', 0) for r in completed])
+        result.processed += sum([r.get('processed', 0) for r in completed])
+        result.failed += batch_failed
+
+        # Any batch failure, or an exception after some records landed, is partial
+        result.is_partial = batch_failed > 0 or (bool(raised) and result.processed > 0)
+
+        logger.info(f"Phase 2 complete: {result.processed} processed, {result.failed} failed")
+
+        return result
+
+    def execute_batch_stream(
+        self,
+        records: Iterable[Dict[str, Any]],
+        operation_func: Callable[[List[Dict[str, Any]]], Dict[str, int]],
+        validator_func: Optional[Callable[[Dict[str, Any]], Tuple[bool, Optional[str]]]] = None,
+        batch_size: int = 100
+    ) -> TransactionBatchResult:
+        """
+        Execute a batch operation over an iterable without materializing all valid records.
+
+        Records are read batch_size at a time, validated, and handed to
+        operation_func as soon as batch_size valid records are pending, so memory
+        stays O(batch_size) when records is a generator. Unlike execute_batch,
+        validation and processing interleave: if operation_func raises, records
+        not yet read are neither validated nor counted.
+
+        Args:
+            records: Iterable of records to process (may be a generator)
+            operation_func: Function that processes records (should return dict with processed/failed)
+            validator_func: Optional validation function (record) -> (is_valid, error_message)
+            batch_size: Process records in batches of this size
+
+        Returns:
+            TransactionBatchResult with detailed statistics
+        """
+        result = TransactionBatchResult()
+        logger.info(f"Streaming records in batches of {batch_size}")
+
+        source = iter(records)
+        pending = []
+        batch_number = 0
+        try:
+            while True:
+                chunk = list(islice(source, batch_size))
+                if chunk:
+                    pending.extend(self._prevalidate(chunk, validator_func, result))
+                # Drain full batches; once the source is exhausted, drain the remainder too
+                while pending and (len(pending) >= batch_size or not chunk):
+                    batch = pending[:batch_size]
+                    del pending[:batch_size]
+                    batch_number += 1
+                    logger.info("Processing batch %d (%d records)", batch_number, len(batch))
+
+                    batch_result = operation_func(batch)
+                    result.processed += batch_result.get('processed', 0)
+                    result.failed += batch_result.get('failed', 0)
+
+                    # If batch had failures, mark as partial
+                    if batch_result.get('failed', 0) > 0:
+                        result.is_partial = True
+                if not chunk:
+                    break
+
+            logger.info(f"Stream complete: {result.processed} processed, {result.failed} failed")
+
+        except Exception as e:
+            logger.error(f"Batch processing error: {str(e)}", exc_info=True)
+            result.add_error({
                 'error': str(e),
                 'phase': 'processing'
             })
@@ -147,11 +450,121 @@ class TransactionManager:
 
         return result
 
+    def _prevalidate(
+        self,
+        records: List[Dict[str, Any]],
+        validator_func: Optional[Callable[[Dict[str, Any]], Tuple[bool, Optional[str]]]],
+        result: TransactionBatchResult
+    ) -> List[Dict[str, Any]]:
+        """Validate all records, recording failures on result. Returns the valid records in order."""
+        if validator_func is None:
+            return list(records)
+
+        failed_before = result.failed
+        valid_records = []
+        invalid_indices = _invalid_indices(validator_func, records)
+
+        if invalid_indices is not None:
+            # Column-wise pass flagged these records; only they need a per-record
+            # pass for their error messages, the runs between them are kept as-is
+            start = 0
+            for index in invalid_indices:
+                valid_records.extend(records[start:index])
+                start = index + 1
+                if self._validate_record(records[index], validator_func, result):
+                    valid_records.append(records[index])
+            valid_records.extend(records[start:])
+        else:
+            validate_record = self._validate_record
+            append = valid_records.append
+            for record in records:
+                if validate_record(record, validator_func, result):
+                    append(record)
+
+        failures = result.failed - failed_before
+        if failures and logger.isEnabledFor(logging.WARNING):
+            error_counts = Counter(
+                error['error'] for error in result.errors if error.get('phase') == 'validation'
+            )
+            logger.warning(
+                "Validation failed for %d of %d records (first errors: %s)",
+                failures, len(records), dict(error_counts)
+            )
+
+        return valid_records
+
+    def _split_batches(
+        self,
+        valid_records: List[Dict[str, Any]],
+        batch_size: Optional[int],
+        max_payload_bytes: Optional[int]
+    ) -> List[List[Dict[str, Any]]]:
+        """Split valid records into fixed-size batches, or payload-sized ones if max_payload_bytes is set."""
+        batch_size = batch_size or self.batcher.next_size()
+        if max_payload_bytes:
+            batches = _payload_batches(valid_records, max_payload_bytes)
+            logger.info(f"Phase 2: Processing {len(valid_records)} valid records in {len(batches)} batches of at most {max_payload_bytes} bytes")
+        else:
+            batches = [valid_records[i:i + batch_size] for i in range(0, len(valid_records), batch_size)]
+            logger.info(f"Phase 2: Processing {len(valid_records)} valid records in batches of {batch_size}")
+        return batches
+
+    def _adaptive_batches(self, valid_records: List[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+        """Yield batches sized by self.batcher, timing each one until the caller asks for the next."""
+        start = 0
+        batch_number = 0
+        while start < len(valid_records):
+            size = self.batcher.next_size()
+            batch = valid_records[start:start + size]
+            batch_number += 1
+            logger.info("Processing batch %d (adaptive size %d)", batch_number, size)
+
+            started = time.perf_counter()
+            yield batch
+            self.batcher.record((time.perf_counter() - started) * 1000, len(batch))
+            start += size
+
+    @staticmethod
+    def _validate_record(
+        record: Dict[str, Any],
+        validator_func: Callable[[Dict[str, Any]], Tuple[bool, Optional[str]]],
+        result: TransactionBatchResult
+    ) -> bool:
+        """Validate one record, recording any failure on result. Returns True if valid."""
+        try:
+            is_valid, error_msg = validator_func(record)
+            if not is_valid:
+                result.failed += 1
+                if not result.errors_full:
+                    result.add_error({
+                        'record': _record_repr.repr(record),  # Truncated for logging
+                        'error': error_msg,
+                        'phase': 'validation'
+                    })
+                # Per-record detail only at DEBUG; _prevalidate logs one summary warning
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Validation failed: {error_msg}")
+                return False
+
+            return True
+
+        except Exception as e:
+            result.failed += 1
+            if not result.errors_full:
+                result.add_error({
+                    'record': _record_repr.repr(record),
+                    'error': str(e),
+                    'phase': 'validation'
+                })
+            logger.error(f"Validation error: {str(e)}")
+            return False
+
     def execute_transactional_batch(
         self,
         records: List[Dict[str, Any]],
         operation_func: Callable[[Dict[str, Any]], Dict[str, int]],
-        validator_func: Optional[Callable[[Dict[str, Any]], Tuple[bool, Optional[str]]]] = None
+        validator_func: Optional[Callable[[Dict[str, Any]], Tuple[bool, Optional[str]]]] = None,
+        bulk_operation_func: Optional[Callable[[List[Dict[str, Any]]], Dict[str, int]]] = None
     ) -> TransactionBatchResult:
         """
         Execute batch operation with fail-fast semantics.
@@ -163,6 +576,8 @@ class TransactionManager:
             records: List of records to process
             operation_func: Function that processes single record
             validator_func: Optional validation function
+            bulk_operation_func: Optional function that processes all records in one
+                call; when given it is used instead of calling operation_func per record
 
         Returns:
             TransactionBatchResult with detailed statistics
@@ -172,151 +587,224 @@ class TransactionManager:
 
         result = TransactionBatchResult()
 
-        # Phase 1: Validate all records
+        # Phase 1: Validate all records, stopping at the first failure
         logger.info(f"Validating {len(records)} records for transactional batch")
 
-        for record in records:
-            if validator_func:
-                is_valid, error_msg = validator_func(record)
-                if not is_valid:
-                    result.failed = len(records)  # All records failed
-                    result.errors.append({
-                        'error': f"Validation failed for all records: {error_msg}",
-                        'phase': 'validation'
-                    })
-                    return result
+        if validator_func:
+            # The column-wise pass narrows the per-record check to flagged records
+            invalid_indices = _invalid_indices(validator_func, records)
+            candidates = records if invalid_indices is None else [records[i] for i in invalid_indices]
+            invalid = next(
+                (outcome for outcome in map(validator_func, candidates) if not outcome[0]),
+                None
+            )
+            if invalid is not None:
+                result.failed = len(records)  # All records failed
+                result.add_error({
+                    'error': f"Validation failed for all records: {invalid[1]}",
+                    'phase': 'validation'
+                })
+                return result
 
         # Phase 2: Process all records or fail completely
         logger.info(f"Processing {len(records)} records transactionally")
 
-        processed_records = []
+        if bulk_operation_func is not None:
+            return self._execute_bulk_transaction(records, bulk_operation_func, result)
+
+        index = 0
         try:
-            for record in records:
-                record_result = operation_func(record)
-                if record_result.get('failed', 0) > 0:
+            for index, record in enumerate(records):
+                if operation_func(record).get('failed', 0) > 0:
                     # Rollback: mark all as failed
                     result.failed = len(records)
-                    result.is_partial = len(processed_records) > 0
-                    result.errors.append({
+                    result.is_partial = index > 0
+                    result.add_error({
                         'error': f"Record failed, aborting transaction: {record.get('id', 'unknown')}",
                         'phase': 'processing'
                     })
-                    logger.error(f"Transactional batch failed at record {len(processed_records) + 1}")
+                    logger.error(f"Transactional batch failed at record {index + 1}")
                     return result
 
-                processed_records.append(record)
-
-            result.processed = len(processed_records)
+            result.processed = len(records)
             logger.info(f"Transactional batch succeeded: {result.processed} processed")
 
         except Exception as e:
             logger.error(f"Transactional batch error: {str(e)}", exc_info=True)
             result.failed = len(records)
-            result.is_partial = len(processed_records) > 0
-            result.errors.append({
+            result.is_partial = index > 0
+            result.add_error({
                 'error': str(e),
                 'phase': 'processing'
             })
 
         return result
 
+    @staticmethod
+    def _execute_bulk_transaction(
+        records: List[Dict[str, Any]],
+        bulk_operation_func: Callable[[List[Dict[str, Any]]], Dict[str, int]],
+        result: TransactionBatchResult
+    ) -> TransactionBatchResult:
+        """Phase 2 of execute_transactional_batch as a single call for all records."""
+        try:
+            bulk_result = bulk_operation_func(records)
+        except Exception as e:
+            logger.error(f"Transactional batch error: {str(e)}", exc_info=True)
+            result.failed = len(records)
+            result.add_error({
+                'error': str(e),
+                'phase': 'processing'
+            })
+            return result
 
-def validate_warehouse_record(record: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
-    """Validate warehouse record."""
-    warehouse_code = record.get("warehouse_code")
-    if not warehouse_code:
-        return False, "Missing warehouse_code"
-    return True, None
-
-
-def validate_vendor_record(record: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
-    """Validate vendor record."""
-    vendor_code = record.get("vendor_code")
-    if not vendor_code:
-        return False, "Missing vendor_code"
-    return True, None
-
-
-def validate_item_record(record: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
-    """Validate item record."""
-    item_code = record.get("item_code")
-    if not item_code:
-        return False, "Missing item_code"
-    return True, None
-
-
-def validate_inventory_record(record: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
-    """Validate inventory record."""
-    item_code = record.get("item_code")
-    warehouse_code = record.get("warehouse_code")
-
-    if not item_code:
-        return False, "Missing item_code"
-    if not warehouse_code:
-        return False, "Missing warehouse_code"
-
-    # Validate quantity is numeric
-    try:
-        float(record.get("on_hand_qty", 0))
-    except (ValueError, TypeError):
-        return False, "Invalid on_hand_qty: must be numeric"
-
-    return True, None
-
-
-def validate_sales_order_record(record: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
-    """Validate sales order record."""
-    order_id = record.get("order_id")
-    if not order_id:
-        return False, "Missing order_id"
-
-    # Validate order_id is integer
-    try:
-        int(order_id)
-    except (ValueError, TypeError):
-        return False, "Invalid order_id: must be integer"
-
-    return True, None
-
-
-def validate_purchase_order_record(record: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
-    """Validate purchase order record."""
-    order_id = record.get("order_id")
-    if not order_id:
-        return False, "Missing order_id"
-
-    try:
-        int(order_id)
-    except (ValueError, TypeError):
-        return False, "Invalid order_id: must be integer"
-
-    return True, None
-
+        if bulk_result.get('failed', 0) > 0:
+            # Rollback: mark all as failed
+            result.failed = len(records)
+            result.is_partial = bulk_result.get('processed', 0) > 0
+            result.add_error({
+                'error': f"{bulk_result['failed']} records failed, aborting transaction",
+                'phase': 'processing'
+            })
+            logger.error(f"Transactional bulk batch failed: {bulk_result['failed']} of {len(records)} records")
+            return result
 
-def validate_cost_record(record: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
-    """Validate cost record."""
-    item_code = record.get("item_code")
-    cost_date = record.get("cost_date")
+        result.processed = len(records)
+        logger.info(f"Transactional batch succeeded: {result.processed} processed")
+        return result
 
-    if not item_code:
-        return False, "Missing item_code"
-    if not cost_date:
-        return False, "Missing cost_date"
 
-    return True, None
+def make_record_validator(
+    required_fields: Tuple[str, ...],
+    numeric_fields: Tuple[str, ...] = (),
+    integer_fields: Tuple[str, ...] = (),
+    code_fields: Tuple[str, ...] = ()
+) -> Callable[[Dict[str, Any]], Tuple[bool, Optional[str]]]:
+    """
+    Build a record validator from a declarative schema.
 
+    The required fields are compiled into an itemgetter so the common case
+    (every required key present and non-empty) is one C-level tuple extraction
+    plus one all() pass; a missing key surfaces as KeyError and falls back to
+    the field-by-field check. Error messages are precomputed and interned once per field.
 
-def validate_pricing_record(record: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
-    """Validate pricing record."""
-    item_code = record.get("item_code")
-    price_list = record.get("price_list")
+    A matching column-wise check is registered in _COLUMN_VALIDATORS so
+    execute_batch can find the failing records of a whole batch one field at
+    a time and run the per-record validator only on those.
 
-    if not item_code:
-        return False, "Missing item_code"
-    if not price_list:
-        return False, "Missing price_list"
+    Args:
+        required_fields: Fields that must be present and non-empty, in reporting order
+        numeric_fields: Fields that must be convertible to float when present
+        integer_fields: Fields that must be convertible to int
+        code_fields: Required fields that must fully match CODE_PATTERN
 
-    return True, None
+    Returns:
+        Validation function (record) -> (is_valid, error_message)
+    """
+    # Interned field names let lookups on records with interned keys short-circuit on identity
+    required_fields = tuple(map(sys.intern, required_fields))
+    numeric_fields = tuple(map(sys.intern, numeric_fields))
+    integer_fields = tuple(map(sys.intern, integer_fields))
+    code_fields = tuple(map(sys.intern, code_fields))
+
+    get_required = itemgetter(*required_fields)
+    multiple_required = len(required_fields) > 1
+    # Interned so validators sharing a field return the very same message object
+    missing_errors = {field: sys.intern(f"Missing {field}") for field in required_fields}
+    numeric_errors = tuple(
+        (field, sys.intern(f"Invalid {field}: must be numeric")) for field in numeric_fields
+    )
+    integer_errors = tuple(
+        (field, sys.intern(f"Invalid {field}: must be integer")) for field in integer_fields
+    )
+    code_errors = tuple(
+        (field, sys.intern(f"Invalid {field}: must match {CODE_PATTERN.pattern}")) for field in code_fields
+    )
+    match_code = CODE_PATTERN.fullmatch
+
+    def validator(record: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+        try:
+            values = get_required(record)
+            present = all(values) if multiple_required else values
+        except KeyError:
+            present = False
+
+        if not present:
+            for field in required_fields:
+                if not record.get(field):
+                    return False, missing_errors[field]
+
+        for field, error in code_errors:
+            value = record[field]
+            if match_code(value if type(value) is str else str(value)) is None:
+                return False, error
+
+        for field, error in numeric_errors:
+            if not _is_numeric(record.get(field, 0)):
+                return False, error
+
+        for field, error in integer_errors:
+            if not _is_integer(record.get(field)):
+                return False, error
+
+        return True, None
+
+    def invalid_indices(records: Sequence[Dict[str, Any]]) -> List[int]:
+        mask = None
+
+        for field in required_fields:
+            column = [record.get(field) for record in records]
+            if not all(column):
+                mask = _and_mask(mask or [True] * len(records), column)
+
+        for field in code_fields:
+            column = [record.get(field) for record in records]
+            passed = [match_code(value if type(value) is str else str(value)) for value in column]
+            if not all(passed):
+                mask = _and_mask(mask or [True] * len(records), passed)
+
+        # A column whose values are all exact int/float instances passes without
+        # calling the per-value predicate; only mixed columns are checked one by one
+        for field in numeric_fields:
+            column = [record.get(field, 0) for record in records]
+            if set(map(type, column)) <= _NUMERIC_TYPES:
+                continue
+            passed = list(map(_is_numeric, column))
+            if not all(passed):
+                mask = _and_mask(mask or [True] * len(records), passed)
+
+        for field in integer_fields:
+            column = [record.get(field) for record in records]
+            if set(map(type, column)) <= _INTEGER_TYPES:
+                continue
+            passed = list(map(_is_integer, column))
+            if not all(passed):
+                mask = _and_mask(mask or [True] * len(records), passed)
+
+        if mask is None:
+            return []
+        return [index for index, ok in enumerate(mask) if not ok]
+
+    _COLUMN_VALIDATORS[validator] = invalid_indices
+    return validator
+
+
+# Record validators, one per data type
+validate_warehouse_record = make_record_validator(
+    ("warehouse_code",),
+    code_fields=("warehouse_code",)
+)
+validate_vendor_record = make_record_validator(("vendor_code",))
+validate_item_record = make_record_validator(("item_code",))
+validate_inventory_record = make_record_validator(
+    ("item_code", "warehouse_code"),
+    numeric_fields=("on_hand_qty",),
+    code_fields=("warehouse_code",)
+)
+validate_sales_order_record = make_record_validator(("order_id",), integer_fields=("order_id",))
+validate_purchase_order_record = make_record_validator(("order_id",), integer_fields=("order_id",))
+validate_cost_record = make_record_validator(("item_code", "cost_date"))
+validate_pricing_record = make_record_validator(("item_code", "price_list"))
 
 
 # Global transaction manager instance
@@ -5,13 +5,27 @@ Run this before deploying to Render to verify everything is set up correctly
 
 import os
 import sys
+from functools import lru_cache
 from cryptography.fernet import Fernet
-import json
+import orjson
 
 
-def check_file_exists(filepath, description):
-    """Check if a file exists."""
-    if os.path.exists(filepath):
+def list_present_files(filepaths):
+    """Return the subset of filepaths that exist, scanning each parent directory once."""
+    present = set()
+    for directory in {os.path.dirname(path) for path in filepaths}:
+        try:
+            with os.scandir(directory or '.') as entries:
+                # Join with '/' to match the keys as written, on Windows too
+                present.update(f"{directory}/{entry.name}" if directory else entry.name for entry in entries)
+        except FileNotFoundError:
+            continue
+    return present
+
+
+def check_file_exists(filepath, description, present=None):
+    """Check if a file exists, using a precomputed set of present paths if given."""
+    if (filepath in present) if present is not None else os.path.exists(filepath):
         print(f"✅ {description}: {filepath}")
         return True
     else:
@@ -38,6 +52,12 @@ def check_env_variable(var_name, required=True):
         return False
 
 
+@lru_cache(maxsize=4)
+def _get_cipher(key):
+    """Return a Fernet cipher for key, built once per distinct key."""
+    return Fernet(key.encode('utf-8'))
+
+
 def test_encryption():
     """Test Fernet encryption/decryption."""
     try:
@@ -46,10 +66,10 @@ def test_encryption():
             print("❌ Cannot test encryption: ENCRYPTION_KEY not set")
             return False
 
-        cipher = Fernet(key.encode('utf-8'))
+        cipher = _get_cipher(key)
         test_data = {"test": "data"}
-        encrypted = cipher.encrypt(json.dumps(test_data).encode('utf-8'))
-        decrypted = json.loads(cipher.decrypt(encrypted).decode('utf-8'))
+        encrypted = cipher.encrypt(orjson.dumps(test_data))
+        decrypted = orjson.loads(cipher.decrypt(encrypted))
 
         if decrypted == test_data:
             print("✅ Encryption/decryption test PASSED")
@@ -82,9 +102,11 @@ def validate_project_structure():
         "tests/test_app.py": "Test suite"
     }
 
+    present = list_present_files(required_files)
+
     all_exist = True
     for file, description in required_files.items():
-        if not check_file_exists(file, description):
+        if not check_file_exists(file, description, present):
             all_exist = False
 
     return all_exist